@@ -78,7 +78,8 @@ grader.add_basic_part('4c-0-basic', test4c0, max_points=1, description='simple t
 
 
 def gen_sentence(alphabet_size, length):
-    return ' '.join(str(random.randint(0, alphabet_size)) for _ in range(length))
+    # One bulk draw instead of `length` separate randint() calls
+    return ' '.join(map(str, random.choices(range(alphabet_size + 1), k=length)))
 
 
 def test4c1():
@@ -114,8 +115,8 @@ grader.add_basic_part('4d-0-basic', test4d0, max_points=1, description='simple t
 
 def randvec():
     v = collections.defaultdict(float)
-    for _ in range(10):
-        v[random.randint(0, 10)] = random.randint(0, 10) - 5
+    # Two bulk draws (keys, then values) instead of 20 separate randint() calls
+    v.update(zip(random.choices(range(11), k=10), random.choices(range(-5, 6), k=10)))
     return v
 
 
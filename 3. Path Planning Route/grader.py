@@ -5,6 +5,11 @@ from typing import List, Optional
 
 import graderUtil
 import util
+
+try:
+    import orjson  # Optional: faster JSON encoder for `printPath`
+except ImportError:
+    orjson = None
 from mapUtil import (
     CityMap,
     checkValid,
@@ -28,7 +33,7 @@ def extractPath(startLocation: str, search: util.SearchAlgorithm) -> List[str]:
     We extract a sequence of locations from `search.path` (see util.py to better
     understand exactly how this list gets populated).
     """
-    return [startLocation] + search.actions
+    return [startLocation, *search.actions]
 
 
 def printPath(
@@ -37,21 +42,25 @@ def printPath(
     cityMap: CityMap,
     outPath: Optional[str] = "path.json",
 ):
+    waypointTagSet = frozenset(waypointTags)
     doneWaypointTags = set()
     for location in path:
-        for tag in cityMap.tags[location]:
-            if tag in waypointTags:
-                doneWaypointTags.add(tag)
-        tagsStr = " ".join(cityMap.tags[location])
+        tags = cityMap.tags[location]
+        doneWaypointTags.update(waypointTagSet.intersection(tags))
+        tagsStr = " ".join(tags)
         doneTagsStr = " ".join(sorted(doneWaypointTags))
         print(f"Location {location} tags:[{tagsStr}]; done:[{doneTagsStr}]")
     print(f"Total distance: {getTotalCost(path, cityMap)}")
 
     # (Optional) Write path to file, for use with `visualize.py`
     if outPath is not None:
-        with open(outPath, "w") as f:
-            data = {"waypointTags": waypointTags, "path": path}
-            json.dump(data, f, indent=2)
+        data = {"waypointTags": waypointTags, "path": path}
+        if orjson is not None:
+            with open(outPath, "wb") as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        else:
+            with open(outPath, "w") as f:
+                json.dump(data, f, indent=2)
 
 
 # Instantiate the Stanford Map as a constant --> just load once!
@@ -486,7 +495,9 @@ class ZeroHeuristic(util.Heuristic):
         self.endTag = endTag
         self.cityMap = cityMap
 
-    def evaluate(self, state: util.State) -> float:
+    # No instance state is needed, so skip binding `self` on every (hot) call
+    @staticmethod
+    def evaluate(state: util.State) -> float:
         return 0.0
 
 
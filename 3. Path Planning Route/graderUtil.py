@@ -16,17 +16,29 @@ Usage (see grader.py):
 
     # run grading
     grader.grade()
+
+Pass `--jobs N` to grade independent parts in N worker processes (0 = one per CPU).
 """
 
 import argparse
+import concurrent.futures
+import contextlib
+import ctypes
 import datetime
 import gc
+import io
 import json
+import multiprocessing
 import os
-import signal
 import sys
+import threading
 import traceback
 
+try:
+    import numpy as np
+except ImportError:  # Optional: only needed to compare numpy array answers
+    np = None
+
 default_max_seconds = 5  # 5 second
 TOLERANCE = 1e-4  # For measuring whether two floats are equal
 
@@ -47,36 +59,46 @@ def is_collection(x):
 
 # Return whether two answers are equal.
 def is_equal(true_answer, pred_answer, tolerance=TOLERANCE):
-    # Handle floats specially
-    if isinstance(true_answer, float) or isinstance(pred_answer, float):
-        return abs(true_answer - pred_answer) < tolerance
-    # Recurse on collections to deal with floats inside them
-    if is_collection(true_answer) and is_collection(pred_answer) and len(true_answer) == len(pred_answer):
-        for a, b in zip(true_answer, pred_answer):
-            if not is_equal(a, b):
+    # Nested answers are compared pair by pair off an explicit stack (instead of
+    # recursing), stopping at the first mismatch; children are pushed in reverse so
+    # they are compared in order
+    pending = [(true_answer, pred_answer)]
+    while pending:
+        true_answer, pred_answer = pending.pop()
+
+        # Handle floats specially
+        if isinstance(true_answer, float) or isinstance(pred_answer, float):
+            if not abs(true_answer - pred_answer) < tolerance:
                 return False
-        return True
-    if isinstance(true_answer, dict) and isinstance(pred_answer, dict):
-        if len(true_answer) != len(pred_answer):
-            return False
-        for k, v in list(true_answer.items()):
-            if not is_equal(pred_answer.get(k), v):
+            continue
+        # Compare elements of collections to deal with floats inside them
+        if is_collection(true_answer) and is_collection(pred_answer) and len(true_answer) == len(pred_answer):
+            pending.extend(reversed(list(zip(true_answer, pred_answer))))
+            continue
+        if isinstance(true_answer, dict) and isinstance(pred_answer, dict):
+            if len(true_answer) != len(pred_answer):
                 return False
-        return True
+            pending.extend(
+                reversed([(pred_answer.get(k), v) for k, v in true_answer.items()])
+            )
+            continue
 
-    # Numpy array comparison
-    if type(true_answer).__name__ == 'ndarray':
-        import numpy as np
-        if isinstance(true_answer, np.ndarray) and isinstance(pred_answer, np.ndarray):
+        # Numpy array comparison
+        if np is not None and isinstance(true_answer, np.ndarray) and isinstance(pred_answer, np.ndarray):
             if true_answer.shape != pred_answer.shape:
                 return False
-            for a, b in zip(true_answer, pred_answer):
-                if not is_equal(a, b):
+            if np.issubdtype(true_answer.dtype, np.number) and np.issubdtype(pred_answer.dtype, np.number):
+                # Compare all elements at once, rather than one pair at a time
+                if not np.allclose(true_answer, pred_answer, rtol=0, atol=tolerance):
                     return False
-            return True
+            else:
+                pending.extend(reversed(list(zip(true_answer, pred_answer))))
+            continue
 
-    # Do normal comparison
-    return true_answer == pred_answer
+        # Do normal comparison
+        if not true_answer == pred_answer:
+            return False
+    return True
 
 
 # Run a function, timing out after max_seconds.
@@ -89,27 +111,46 @@ class TimeoutFunction:
         self.max_seconds = max_seconds
         self.function = function
 
-    @staticmethod
-    def handle_max_seconds(signum, frame):
-        print('TIMEOUT!')
-        raise TimeoutFunctionException()
-
     def __call__(self, *args):
-        if os.name == 'nt':
-            # Windows does not have signal.SIGALRM
-            # Will not stop after max_seconds second but can still throw an exception
-            time_start = datetime.datetime.now()
-            result = self.function(*args)
-            time_end = datetime.datetime.now()
-            if time_end - time_start > datetime.timedelta(seconds=self.max_seconds + 1):
-                raise TimeoutFunctionException()
-            return result
-            # End modification for Windows here
-        #signal.signal(signal.SIGALRM, self.handle_max_seconds)
-        #signal.alarm(self.max_seconds + 1)
-        result = self.function(*args)
-        #signal.alarm(0)
-        return result
+        # Run the function in a separate thread and wait up to max_seconds (+1); if it
+        # is still running by then, asynchronously raise TimeoutFunctionException in
+        # that thread to stop it. Unlike signal.SIGALRM, this works on every platform
+        # and leaves no signal handler installed while the function runs.
+        outcome = {}
+
+        def run():
+            try:
+                outcome['result'] = self.function(*args)
+            except BaseException as e:
+                outcome['error'] = e
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        thread.join(self.max_seconds + 1)
+        if thread.is_alive():
+            ctypes.pythonapi.PyThreadState_SetAsyncExc(
+                ctypes.c_ulong(thread.ident), ctypes.py_object(TimeoutFunctionException))
+            # Give the thread a moment to unwind; one stuck in C code won't see the
+            # exception until it next runs Python bytecode, and may outlive this join.
+            thread.join(1)
+            print('TIMEOUT!')
+            raise TimeoutFunctionException()
+        if 'error' in outcome:
+            raise outcome['error']
+        return outcome.get('result')
+
+
+# The grader whose parts are being graded by worker processes; workers are forked, so
+# they inherit it (along with any state the parts close over, e.g. loaded maps).
+_parallel_grader = None
+
+
+def _grade_part_in_worker(index):
+    part = _parallel_grader.parts[index]
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        _parallel_grader.grade_part(part)
+    return part.points, part.seconds, part.messages, part.failed, part.side, output.getvalue()
 
 
 class Part:
@@ -167,6 +208,8 @@ class Grader:
         parser.add_argument('--json', action='store_true',
                             help='Write JSON file with information about this assignment')
         parser.add_argument('--summary', action='store_true', help='Don\'t actually run code')
+        parser.add_argument('--jobs', type=int, default=1,
+                            help='Number of parts to grade in parallel (0 = one per CPU)')
         parser.add_argument('remainder', nargs=argparse.REMAINDER)
         self.params = parser.parse_args(args[1:])
 
@@ -235,14 +278,11 @@ class Grader:
         except KeyboardInterrupt:
             raise
         except MemoryError:
-            #signal.alarm(0)
             gc.collect()
             self.fail('Memory limit exceeded.')
         except TimeoutFunctionException:
-            #signal.alarm(0)
             self.fail('Time limit (%s seconds) exceeded.' % part.max_seconds)
         except Exception as e:
-            #signal.alarm(0)
             self.fail('Exception thrown: %s -- %s' % (str(type(e)), str(e)))
             self.print_exception()
         except SystemExit:
@@ -255,7 +295,6 @@ class Grader:
         part.seconds = (end_time - start_time).seconds
         ###### quick fix to pacman problem 4 ######
         if part.seconds > part.max_seconds:
-            #signal.alarm(0)
             self.fail('Time limit (%s seconds) exceeded.' % part.max_seconds)
         ###### quick fix to pacman problem 4 ######
         if part.is_hidden() and not self.useSolution:
@@ -266,6 +305,18 @@ class Grader:
             part.number, end_time - start_time, part.max_seconds, display_points))
         print()
 
+    def grade_parts_in_parallel(self, parts, max_workers):
+        """Grade `parts` in forked worker processes, reporting results in order."""
+        global _parallel_grader
+        _parallel_grader = self
+        context = multiprocessing.get_context('fork')
+        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+            futures = [executor.submit(_grade_part_in_worker, self.parts.index(part)) for part in parts]
+            for part, future in zip(parts, futures):
+                part.points, part.seconds, part.messages, part.failed, part.side, output = future.result()
+                print(output, end='')
+        _parallel_grader = None
+
     def get_selected_parts(self):
         parts = []
         for part in self.parts:
@@ -291,8 +342,12 @@ class Grader:
         # Grade it!
         if not self.params.summary and not self.fatalError:
             print('========== START GRADING')
-            for part in parts:
-                self.grade_part(part)
+            max_workers = self.params.jobs or os.cpu_count()
+            if max_workers > 1 and len(parts) > 1 and 'fork' in multiprocessing.get_all_start_methods():
+                self.grade_parts_in_parallel(parts, max_workers)
+            else:
+                for part in parts:
+                    self.grade_part(part)
 
             # When students have it (not useSolution), only include basic tests.
             active_parts = [part for part in parts if self.useSolution or part.basic]
@@ -1,14 +1,23 @@
 import json
+import sys
+from array import array
+from bisect import bisect_left
 from collections import defaultdict
-from dataclasses import dataclass
 from math import asin, cos, radians, sin, sqrt
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
 
+import numpy as np
 import osmium
 from osmium import osm
 
+try:
+    import orjson  # Optional: faster JSON parser for `addLandmarks`
+except ImportError:
+    orjson = None
+
 # Constants
 RADIUS_EARTH = 6371000  # Radius of earth in meters (~ equivalent to 3956 miles).
+DIAMETER_EARTH = 2 * RADIUS_EARTH  # Folded into the Haversine formula's final step.
 UNIT_DELTA = 0.00001    # Denotes the change in latitude/longitude (in degrees) that
                         # equates to distance of ~1m.
 
@@ -29,13 +38,23 @@ UNIT_DELTA = 0.00001    # Denotes the change in latitude/longitude (in degrees)
 #                                    defined manually as "landmarks" in
 #                                    `data/stanford-landmarks.json`.
 #
+#       + `tagIndex` [str -> List[str]]: The inverse of `tags`; maps each tag to the
+#                                        sorted labels of all locations with that tag
+#                                        (kept in sync by `addLocation`/`addTag`).
+#
 #       + `distances` [str -> [str -> float]]: A nested dictionary mapping pairs of
 #                                              locations to distances (e.g.,
 #                                              `distances[label1][label2] = 21.3`).
+#
+#   > `CityMap.finalize()` additionally packs the map into flat, integer-indexed arrays
+#     (CSR layout) for code that wants to sweep every location/connection at once
+#     (e.g., `visualization.plotMap`); nothing calls it by default:
+#       + `labels` [int -> str] / `labelIds` [str -> int]: contiguous integer ids.
+#       + `neighborPtr`, `neighborIds`: the neighbors of location `i` are
+#         `neighborIds[neighborPtr[i]:neighborPtr[i + 1]]` (int32).
 
 
-@dataclass(frozen=True)
-class GeoLocation:
+class GeoLocation(NamedTuple):
     """A latitude/longitude of a physical location on Earth."""
     latitude: float
     longitude: float
@@ -56,14 +75,43 @@ class CityMap:
         # Location label -> list of tags (e.g., amenity=park)
         self.tags: Dict[str, List[str]] = defaultdict(list)
 
+        # Tag -> sorted list of the labels of all locations with that tag
+        self.tagIndex: Dict[str, List[str]] = {}
+
         # Location label -> adjacent location label -> distance between the two
         self.distances: Dict[str, Dict[str, float]] = defaultdict(dict)
 
+        # Integer-indexed (CSR) view of the above; populated by `finalize()`
+        self.labels: List[str] = []
+        self.labelIds: Dict[str, int] = {}
+        self.neighborPtr = array("i", [0])
+        self.neighborIds = array("i")
+        self.finalized = False
+
     def addLocation(self, label: str, location: GeoLocation, tags: List[str]) -> None:
         """Add a location (denoted by `label`) to map with the provided set of tags."""
         assert label not in self.geoLocations, f"Location {label} already processed!"
         self.geoLocations[label] = location
-        self.tags[label] = [makeTag("label", label)] + tags
+
+        # Intern tags, so that every location with the same tag shares one `str` object
+        # (`tag in tags` then matches on identity, and the hash is computed just once)
+        self.tags[label] = [sys.intern(tag) for tag in [makeTag("label", label), *tags]]
+        for tag in self.tags[label]:
+            self.indexTag(label, tag)
+        self.finalized = False
+
+    def addTag(self, label: str, tag: str) -> None:
+        """Add a tag to an existing location (denoted by `label`)."""
+        tag = sys.intern(tag)
+        self.tags[label].append(tag)
+        self.indexTag(label, tag)
+
+    def indexTag(self, label: str, tag: str) -> None:
+        """Record `label` under `tag` in `self.tagIndex` (keeping each list sorted)."""
+        labels = self.tagIndex.setdefault(tag, [])
+        idx = bisect_left(labels, label)
+        if idx == len(labels) or labels[idx] != label:
+            labels.insert(idx, label)
 
     def addConnection(
         self, source: str, target: str, distance: Optional[float] = None
@@ -75,6 +123,28 @@ class CityMap:
             )
         self.distances[source][target] = distance
         self.distances[target][source] = distance
+        self.finalized = False
+
+    def finalize(self) -> None:
+        """
+        Pack locations and connections into the integer-indexed CSR arrays described
+        at the top of this file. Call once all locations/connections have been added;
+        this is a no-op if nothing changed since the last call.
+        """
+        if self.finalized:
+            return
+        self.labels = list(self.geoLocations)
+        self.labelIds = {label: i for i, label in enumerate(self.labels)}
+
+        neighborPtr, neighborIds = array("i", [0]), array("i")
+        for label in self.labels:
+            neighborIds.extend(
+                self.labelIds[neighbor] for neighbor in self.distances[label]
+            )
+            neighborPtr.append(len(neighborIds))
+
+        self.neighborPtr, self.neighborIds = neighborPtr, neighborIds
+        self.finalized = True
 
 
 def addLandmarks(
@@ -89,8 +159,18 @@ def addLandmarks(
     may not *exactly* line up with existing locations in the CityMap, so instead we map
     a given landmark onto the closest existing location (subject to a max tolerance).
     """
-    with open(landmarkPath) as f:
-        landmarks = json.load(f)
+    if orjson is not None:
+        with open(landmarkPath, "rb") as f:
+            landmarks = orjson.loads(f.read())
+    else:
+        with open(landmarkPath) as f:
+            landmarks = json.load(f)
+
+    # Gather all existing locations into arrays (in radians), so that we can compute
+    # the distance from a landmark to every location in one call to `computeDistances`
+    labels = list(cityMap.geoLocations)
+    latitudes, longitudes = np.radians(list(cityMap.geoLocations.values())).T
+    cosLatitudes = np.cos(latitudes)
 
     # Iterate through landmarks and map onto the closest location in `cityMap`
     for item in landmarks:
@@ -98,15 +178,14 @@ def addLandmarks(
         geo = GeoLocation(float(latitudeString), float(longitudeString))
 
         # Find the closest location by searching over all locations in `cityMap`
-        bestDistance, bestLabel = min(
-            (computeDistance(geo, existingGeo), existingLabel)
-            for existingLabel, existingGeo in cityMap.geoLocations.items()
-        )
+        distances = computeDistances(geo, latitudes, longitudes, cosLatitudes)
+        bestIdx = int(np.argmin(distances))
+        bestDistance, bestLabel = distances[bestIdx], labels[bestIdx]
 
         if bestDistance < toleranceMeters:
             for key in ["landmark", "amenity"]:
                 if key in item:
-                    cityMap.tags[bestLabel].append(makeTag(key, item[key]))
+                    cityMap.addTag(bestLabel, makeTag(key, item[key]))
 
 ########################################################################################
 # Utility Functions
@@ -118,10 +197,8 @@ def makeTag(key: str, value: str) -> str:
 
 
 def locationFromTag(tag: str, cityMap: CityMap) -> Optional[str]:
-    possibleLocations = sorted(
-        [location for location, tags in cityMap.tags.items() if tag in tags]
-    )
-    return possibleLocations[0] if len(possibleLocations) > 0 else None
+    possibleLocations = cityMap.tagIndex.get(tag)  # Already sorted
+    return possibleLocations[0] if possibleLocations else None
 
 
 def computeDistance(geo1: GeoLocation, geo2: GeoLocation) -> float:
@@ -149,14 +226,78 @@ def computeDistance(geo1: GeoLocation, geo2: GeoLocation) -> float:
     lon1, lat1 = radians(geo1.longitude), radians(geo1.latitude)
     lon2, lat2 = radians(geo2.longitude), radians(geo2.latitude)
 
-    # Haversine formula
-    deltaLon, deltaLat = lon2 - lon1, lat2 - lat1
-    haversine = (sin(deltaLat / 2) ** 2) + (cos(lat1) * cos(lat2)) * (
-        sin(deltaLon / 2) ** 2
+    # Haversine formula (squaring via multiplication, rather than the generic `**`)
+    sinHalfDeltaLat = sin((lat2 - lat1) * 0.5)
+    sinHalfDeltaLon = sin((lon2 - lon1) * 0.5)
+    haversine = sinHalfDeltaLat * sinHalfDeltaLat + (cos(lat1) * cos(lat2)) * (
+        sinHalfDeltaLon * sinHalfDeltaLon
     )
 
     # Return distance d (factor in radius of earth in meters)
-    return 2 * RADIUS_EARTH * asin(sqrt(haversine))
+    return DIAMETER_EARTH * asin(sqrt(haversine))
+
+
+def computeDistances(
+    geo: GeoLocation,
+    latitudes: np.ndarray,
+    longitudes: np.ndarray,
+    cosLatitudes: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Vectorized version of `computeDistance`: compute the distance from `geo` to each
+    of many locations at once, using NumPy for the Haversine formula.
+
+    :param geo: Source `GeoLocation`, with attributes for latitude/longitude.
+    :param latitudes: Array of target latitudes (in *radians*).
+    :param longitudes: Array of target longitudes (in *radians*), same length.
+    :param cosLatitudes: (Optional) `np.cos(latitudes)`, if already computed -- pass
+                         this when calling repeatedly with the same targets.
+
+    :return: Returns an array with the distance (in meters) from geo to each target.
+    :rtype: np.ndarray (distances)
+    """
+    lon1, lat1 = radians(geo.longitude), radians(geo.latitude)
+    if cosLatitudes is None:
+        cosLatitudes = np.cos(latitudes)
+
+    # Haversine formula
+    sinHalfDeltaLat = np.sin((latitudes - lat1) * 0.5)
+    sinHalfDeltaLon = np.sin((longitudes - lon1) * 0.5)
+    haversine = sinHalfDeltaLat * sinHalfDeltaLat + (cos(lat1) * cosLatitudes) * (
+        sinHalfDeltaLon * sinHalfDeltaLon
+    )
+
+    # Return distances (factor in radius of earth in meters)
+    return DIAMETER_EARTH * np.arcsin(np.sqrt(haversine))
+
+
+def computePairDistances(
+    latitudes1: np.ndarray,
+    longitudes1: np.ndarray,
+    latitudes2: np.ndarray,
+    longitudes2: np.ndarray,
+) -> np.ndarray:
+    """
+    Vectorized version of `computeDistance` over pairs: compute the distance between
+    the i-th source and the i-th target location, for every i at once.
+
+    :param latitudes1: Array of source latitudes (in *radians*).
+    :param longitudes1: Array of source longitudes (in *radians*), same length.
+    :param latitudes2: Array of target latitudes (in *radians*), same length.
+    :param longitudes2: Array of target longitudes (in *radians*), same length.
+
+    :return: Returns an array with the distance (in meters) between each pair.
+    :rtype: np.ndarray (distances)
+    """
+    # Haversine formula
+    sinHalfDeltaLat = np.sin((latitudes2 - latitudes1) * 0.5)
+    sinHalfDeltaLon = np.sin((longitudes2 - longitudes1) * 0.5)
+    haversine = sinHalfDeltaLat * sinHalfDeltaLat + (
+        np.cos(latitudes1) * np.cos(latitudes2)
+    ) * (sinHalfDeltaLon * sinHalfDeltaLon)
+
+    # Return distances (factor in radius of earth in meters)
+    return DIAMETER_EARTH * np.arcsin(np.sqrt(haversine))
 
 
 def checkValid(
@@ -167,25 +308,26 @@ def checkValid(
     waypointTags: List[str],
 ) -> bool:
     """Check if a given solution/path is valid subject to the given CityMap instance."""
+    tags, distances = cityMap.tags, cityMap.distances
+
     # Check that path starts with `startLocation`
     if path[0] != startLocation:
         print(f"Invalid path: does not start with {startLocation}")
         return False
 
     # Check that path ends with a location with `endTag`
-    if endTag not in cityMap.tags[path[-1]]:
+    if endTag not in tags[path[-1]]:
         print("Invalid path: final location does not contain {endTag}")
         return False
 
     # Check that adjacent locations are *connected* in the underlying CityMap instance
-    for i in range(len(path) - 1):
-        if path[i + 1] not in cityMap.distances[path[i]]:
-            print(f"Invalid path: {path[i]} is not connected to {path[i + 1]}")
+    for source, target in zip(path, path[1:]):
+        if target not in distances[source]:
+            print(f"Invalid path: {source} is not connected to {target}")
             return False
 
-    # Check that all waypointTags are represented
-    doneTags = set(tag for location in path for tag in cityMap.tags[location])
-    diffTags = set(waypointTags).difference(doneTags)
+    # Check that all waypointTags are represented (remove each location's tags in turn)
+    diffTags = set(waypointTags).difference(*(tags[location] for location in path))
     if len(diffTags) > 0:
         print(f"Invalid path: does not contain waypoints {diffTags}")
         return False
@@ -196,9 +338,10 @@ def checkValid(
 
 def getTotalCost(path: List[str], cityMap: CityMap) -> float:
     """Return the total distance of the given path (assuming it's valid)."""
+    distances = cityMap.distances
     cost = 0.0
-    for i in range(len(path) - 1):
-        cost += cityMap.distances[path[i]][path[i + 1]]
+    for source, target in zip(path, path[1:]):
+        cost += distances[source][target]
     return cost
 
 
@@ -225,18 +368,27 @@ def makeGridLabel(x: int, y: int) -> str:
     return f"{x},{y}"
 
 
-def createGridMap(width: int, height: int) -> CityMap:
-    """Create a simple map width x height grid of locations."""
+def createGridMap(
+    width: int, height: int, tags: Optional[Dict[Tuple[int, int], List[str]]] = None
+) -> CityMap:
+    """
+    Create a simple map width x height grid of locations; `tags` optionally maps grid
+    indices (x, y) to extra tags for that location.
+    """
     cityMap = CityMap()
+    if tags is None:
+        tags = {}
 
     # A "simple" city is just a grid with distance ~1m between adjacent locations.
-    for x, lat in enumerate([x * UNIT_DELTA for x in range(width)]):
-        for y, lon in enumerate([y * UNIT_DELTA for y in range(height)]):
+    lats = [x * UNIT_DELTA for x in range(width)]
+    lons = [y * UNIT_DELTA for y in range(height)]
+    for x, lat in enumerate(lats):
+        for y, lon in enumerate(lons):
             # We label each location as just the grid index (x, y)
             cityMap.addLocation(
                 makeGridLabel(x, y),
                 GeoLocation(lat, lon),
-                tags=[makeTag("x", x), makeTag("y", y)],
+                tags=[makeTag("x", x), makeTag("y", y), *tags.get((x, y), ())],
             )
             if x > 0:
                 cityMap.addConnection(
@@ -249,29 +401,13 @@ def createGridMap(width: int, height: int) -> CityMap:
 
     return cityMap
 
-def createGridMapWithCustomTags(width: int, height: int, tags: Dict[Tuple[int,int], List[str]]) -> CityMap:
-    """Create a simple map width x height grid of locations."""
-    cityMap = CityMap()
 
-    # A "simple" city is just a grid with distance ~1m between adjacent locations.
-    for x, lat in enumerate([x * UNIT_DELTA for x in range(width)]):
-        for y, lon in enumerate([y * UNIT_DELTA for y in range(height)]):
-            # We label each location as just the grid index (x, y)
-            cityMap.addLocation(
-                makeGridLabel(x, y),
-                GeoLocation(lat, lon),
-                tags=[makeTag("x", x), makeTag("y", y)] + tags[(x,y)],
-            )
-            if x > 0:
-                cityMap.addConnection(
-                    makeGridLabel(x - 1, y), makeGridLabel(x, y), distance=1
-                )
-            if y > 0:
-                cityMap.addConnection(
-                    makeGridLabel(x, y - 1), makeGridLabel(x, y), distance=1
-                )
+def createGridMapWithCustomTags(
+    width: int, height: int, tags: Dict[Tuple[int, int], List[str]]
+) -> CityMap:
+    """Create a simple map width x height grid of locations, with custom tags."""
+    return createGridMap(width, height, tags)
 
-    return cityMap
 
 def readMap(osmPath: str) -> CityMap:
     """
@@ -294,7 +430,11 @@ def readMap(osmPath: str) -> CityMap:
 
         def node(self, n: osm.Node) -> None:
             """An `osm.Node` contains the actual tag attributes for a given node."""
-            self.tags[str(n.id)] = [makeTag(tag.k, tag.v) for tag in n.tags]
+            # Skip untagged nodes (`self.tags` is a defaultdict); intern tagged labels
+            if len(n.tags) > 0:
+                self.tags[sys.intern(str(n.id))] = [
+                    makeTag(tag.k, tag.v) for tag in n.tags
+                ]
 
         def way(self, w: osm.Way) -> None:
             """An `osm.Way` contains an ordered list of connected nodes."""
@@ -320,7 +460,7 @@ def readMap(osmPath: str) -> CityMap:
             wayNodes = w.nodes
             for sourceIdx in range(len(wayNodes) - 1):
                 s, t = wayNodes[sourceIdx], wayNodes[sourceIdx + 1]
-                sLabel, tLabel = str(s.ref), str(t.ref)
+                sLabel, tLabel = sys.intern(str(s.ref)), sys.intern(str(t.ref))
                 sLoc = GeoLocation(s.location.lat, s.location.lon)
                 tLoc = GeoLocation(t.location.lat, t.location.lon)
 
@@ -343,9 +483,16 @@ def readMap(osmPath: str) -> CityMap:
             nodeLabel, mapCreator.nodes[nodeLabel], tags=mapCreator.tags[nodeLabel]
         )
 
-    # When adding connections, don't pass distance flag (automatically compute!)
-    for src, tgt in mapCreator.edges:
-        cityMap.addConnection(src, tgt)
+    # Compute the distances of all connections in one vectorized pass, rather than
+    # letting `addConnection` compute them one at a time
+    edges = list(mapCreator.edges)
+    sourceCoordinates = np.radians([mapCreator.nodes[src] for src, _ in edges])
+    targetCoordinates = np.radians([mapCreator.nodes[tgt] for _, tgt in edges])
+    distances = computePairDistances(
+        *sourceCoordinates.reshape(-1, 2).T, *targetCoordinates.reshape(-1, 2).T
+    )
+    for (src, tgt), distance in zip(edges, distances.tolist()):
+        cityMap.addConnection(src, tgt, distance=distance)
 
     return cityMap
 
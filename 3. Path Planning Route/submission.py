@@ -1,10 +1,14 @@
-from typing import List, Tuple
+from collections import defaultdict
+from math import radians
+from typing import Dict, List, Tuple
+
+import numpy as np
 
 from mapUtil import (
+    RADIUS_EARTH,
     CityMap,
     computeDistance,
     createStanfordMap,
-    locationFromTag,
     makeTag,
 )
 from util import Heuristic, SearchProblem, State, UniformCostSearch
@@ -18,6 +22,12 @@ from util import Heuristic, SearchProblem, State, UniformCostSearch
 # `memory` should contain to enable efficient search!
 #   > Check out the docstring for `State` in `util.py` for more details and code.
 
+
+def locationsWithTag(tag: str, cityMap: CityMap) -> List[str]:
+    """Return the labels of all locations in `cityMap` with the given `tag`."""
+    return [location for location, tags in cityMap.tags.items() if tag in tags]
+
+
 ########################################################################################
 # Problem 1a: Modeling the Shortest Path Problem.
 
@@ -33,6 +43,9 @@ class ShortestPathProblem(SearchProblem):
         self.endTag = endTag
         self.cityMap = cityMap
 
+        # Locations carrying `endTag`, for a constant-time `isEnd`
+        self.endLocations = frozenset(locationsWithTag(endTag, cityMap))
+
     def startState(self) -> State:
         # BEGIN_YOUR_CODE (our solution is 1 line of code, but don't worry if you deviate from this)
         return State(location=self.startLocation)
@@ -40,17 +53,16 @@ class ShortestPathProblem(SearchProblem):
 
     def isEnd(self, state: State) -> bool:
         # BEGIN_YOUR_CODE (our solution is 1 line of code, but don't worry if you deviate from this)
-        return self.endTag in self.cityMap.tags[state.location]
+        return state.location in self.endLocations
         # END_YOUR_CODE
 
     def successorsAndCosts(self, state: State) -> List[Tuple[str, State, float]]:
         # BEGIN_YOUR_CODE (our solution is 7 lines of code, but don't worry if you deviate from this)
         result = []
-        
-        for next_location in self.cityMap.distances[state.location]:
-            distance = self.cityMap.distances[state.location][next_location]
+
+        for next_location, distance in self.cityMap.distances[state.location].items():
             result.append((next_location, State(location=next_location), distance))
-        
+
         return result
         # END_YOUR_CODE
 
@@ -103,40 +115,40 @@ class WaypointsShortestPathProblem(SearchProblem):
         self.startLocation = startLocation
         self.endTag = endTag
         self.cityMap = cityMap
+        self.endLocations = frozenset(locationsWithTag(endTag, cityMap))
 
         # We want waypointTags to be consistent/canonical (sorted) and hashable (tuple)
         self.waypointTags = tuple(sorted(waypointTags))
 
+        # `memory` is a bitmask of the waypoints covered so far (bit i is set once
+        # waypointTags[i] is covered); precompute the bits each location covers
+        self.allWaypoints = (1 << len(self.waypointTags)) - 1
+        self.waypointBits = defaultdict(int)
+        for i, tag in enumerate(self.waypointTags):
+            for location in locationsWithTag(tag, cityMap):
+                self.waypointBits[location] |= 1 << i
+
     def startState(self) -> State:
         # BEGIN_YOUR_CODE (our solution is 6 lines of code, but don't worry if you deviate from this)
-        state = State(location=self.startLocation, memory=self.waypointTags)      
-        return state
+        memory = self.waypointBits.get(self.startLocation, 0)
+        return State(location=self.startLocation, memory=memory)
         # END_YOUR_CODE
 
     def isEnd(self, state: State) -> bool:
         # BEGIN_YOUR_CODE (our solution is 5 lines of code, but don't worry if you deviate from this)
-        if self.endTag in self.cityMap.tags[state.location]:
-            return not state.memory
-        return False
+        return (
+            state.memory == self.allWaypoints
+            and state.location in self.endLocations
+        )
         # END_YOUR_CODE
 
     def successorsAndCosts(self, state: State) -> List[Tuple[str, State, float]]:
         # BEGIN_YOUR_CODE (our solution is 17 lines of code, but don't worry if you deviate from this)
         result = []
 
-        memory = state.memory
-        print(memory)
-        for next_location in self.cityMap.distances[state.location]:
-            distance = self.cityMap.distances[state.location][next_location]
-            
-            next_state_memory = list(memory)
-            for tag in state.memory:
-                if tag in self.cityMap.tags[state.location]:
-                    tag_index = next_state_memory.index(tag)
-                    next_state_memory.pop(tag_index)
-            distance += len(next_state_memory) * 50 # Assigning an arbitrary cost to each waypoint
-            next_state_memory = tuple(sorted(next_state_memory))
-            next_state = State(location=next_location, memory=next_state_memory)
+        for next_location, distance in self.cityMap.distances[state.location].items():
+            next_memory = state.memory | self.waypointBits.get(next_location, 0)
+            next_state = State(location=next_location, memory=next_memory)
             result.append((next_location, next_state, distance))
 
         return result
@@ -194,12 +206,11 @@ def aStarReduction(problem: SearchProblem, heuristic: Heuristic) -> SearchProble
         def successorsAndCosts(self, state: State) -> List[Tuple[str, State, float]]:
             # BEGIN_YOUR_CODE (our solution is 8 lines of code, but don't worry if you deviate from this)
             result = []
+            current_estimate = heuristic.evaluate(state)
         
-            for next_location in problem.cityMap.distances[state.location]:
-                new_state = State(location=next_location)
-                past_cost = problem.cityMap.distances[state.location][next_location]
-                future_cost = heuristic.evaluate(new_state)
-                result.append((next_location, new_state, past_cost + future_cost))
+            for action, new_state, cost in problem.successorsAndCosts(state):
+                future_cost = heuristic.evaluate(new_state) - current_estimate
+                result.append((action, new_state, cost + future_cost))
         
             return result
             # END_YOUR_CODE
@@ -222,23 +233,33 @@ class StraightLineHeuristic(Heuristic):
 
         # Precompute
         # BEGIN_YOUR_CODE (our solution is 5 lines of code, but don't worry if you deviate from this)
-        self.targets = []
-        for label in cityMap.geoLocations:
-            label_tags = cityMap.tags[label]
-            if endTag in label_tags:
-                self.targets.append(cityMap.geoLocations[label])
+        # Keep the targets as arrays of radians, so `evaluate` can compute the distance
+        # to all of them in one vectorized Haversine
+        targets = [
+            cityMap.geoLocations[label] for label in locationsWithTag(endTag, cityMap)
+        ]
+        self.targetLatitudes = np.radians([target.latitude for target in targets])
+        self.targetLongitudes = np.radians([target.longitude for target in targets])
+        self.targetCosLatitudes = np.cos(self.targetLatitudes)
+
+        # The estimate only depends on `state.location`; cache it per location
+        self.cache: Dict[str, float] = {}
         # END_YOUR_CODE
 
     def evaluate(self, state: State) -> float:
         # BEGIN_YOUR_CODE (our solution is 6 lines of code, but don't worry if you deviate from this)
-        shortest_target_distance = 10000000.00
-        state_geo_location = self.cityMap.geoLocations[state.location]
-        for target in self.targets:
-            target_distance = computeDistance(target, state_geo_location)
-            if target_distance < shortest_target_distance:
-                shortest_target_distance = target_distance
-        
-        return shortest_target_distance
+        estimate = self.cache.get(state.location)
+        if estimate is None:
+            geo = self.cityMap.geoLocations[state.location]
+            latitude, longitude = radians(geo.latitude), radians(geo.longitude)
+            haversine = np.sin((self.targetLatitudes - latitude) / 2) ** 2 + (
+                self.targetCosLatitudes * np.cos(latitude)
+            ) * np.sin((self.targetLongitudes - longitude) / 2) ** 2
+            distances = 2 * RADIUS_EARTH * np.arcsin(np.sqrt(haversine))
+            estimate = self.cache[state.location] = float(
+                distances.min(initial=10000000.00)
+            )
+        return estimate
         # END_YOUR_CODE
 
 
@@ -251,9 +272,14 @@ class NoWaypointsHeuristic(Heuristic):
     Returns the minimum distance from `startLocation` to any location with `endTag`,
     ignoring all waypoints.
     """
-    def __init__(self, endTag: str, cityMap: CityMap):
+    def __init__(
+        self, endTag: str, cityMap: CityMap, maxCost: float = float("inf")
+    ):
         """
         Precompute cost of shortest path from each location to a location with the desired endTag
+
+        Optionally, only search out to `maxCost` from the `endTag` locations; any location
+        beyond that is at least `maxCost` away, which is still a valid lower bound.
         """
         # Define a reversed shortest path problem from a special END state
         # (which connects via 0 cost to all end locations) to `startLocation`.
@@ -263,7 +289,7 @@ class NoWaypointsHeuristic(Heuristic):
                 Return special "END" state
                 """
                 # BEGIN_YOUR_CODE (our solution is 1 line of code, but don't worry if you deviate from this)
-                return State(location=locationFromTag(endTag, cityMap))
+                return State(location="END")
                 # END_YOUR_CODE
 
             def isEnd(self, state: State) -> bool:
@@ -279,35 +305,31 @@ class NoWaypointsHeuristic(Heuristic):
             def successorsAndCosts(
                 self, state: State
             ) -> List[Tuple[str, State, float]]:
-                
-                
                 # If current location is the special "END" state, 
                 # return all the locations with the desired endTag and cost 0 
                 # (i.e, we connect the special location "END" with cost 0 to all locations with endTag)
                 # Else, return all the successors of current location and their corresponding distances according to the cityMap
                 # BEGIN_YOUR_CODE (our solution is 14 lines of code, but don't worry if you deviate from this)
-                result = []
-
-                if self.isEnd(state):
-                    return result
-                
-                if endTag in cityMap.tags[state.location]:
-                    end_tag_locations = [location for location, tags in cityMap.tags.items() if endTag in tags]
-                    for next_location in end_tag_locations:
-                        result.append((next_location, State(location=next_location), 0))
-                else: 
-                    for next_location in self.cityMap.distances[state.location]:
-                        distance = self.cityMap.distances[state.location][next_location]
-                        result.append((state.location, State(location=next_location), distance))
-        
-                return result
+                if state.location == "END":
+                    return [
+                        (location, State(location=location), 0.0)
+                        for location in endTagLocations
+                    ]
+                return [
+                    (nextLocation, State(location=nextLocation), distance)
+                    for nextLocation, distance in cityMap.distances[
+                        state.location
+                    ].items()
+                ]
                 # END_YOUR_CODE
 
+        endTagLocations = locationsWithTag(endTag, cityMap)
+
         # Call UCS.solve on our `ReverseShortestPathProblem` instance. Because there is
         # *not* a valid end state (`isEnd` always returns False), will exhaustively
         # compute costs to *all* other states.
         # BEGIN_YOUR_CODE (our solution is 2 lines of code, but don't worry if you deviate from this)
-        ucs = UniformCostSearch()
+        ucs = UniformCostSearch(maxCost=maxCost)
         ucs.solve(ReverseShortestPathProblem())
         # END_YOUR_CODE
 
@@ -316,12 +338,23 @@ class NoWaypointsHeuristic(Heuristic):
         # the minimum cost path to each state in our state space.
         #   > Note that we're making a critical assumption here: costs are symmetric!
         # BEGIN_YOUR_CODE (our solution is 1 line of code, but don't worry if you deviate from this)
-        return ucs.pastCosts
+        self.pastCosts = ucs.pastCosts
+
+        # Fallback for locations the search didn't reach: the straight-line distance to
+        # the closest `endTag` location (still a lower bound); if the search was cut off
+        # at `maxCost`, that's a lower bound too
+        self.maxCost = maxCost
+        self.straightLineHeuristic = StraightLineHeuristic(endTag, cityMap)
         # END_YOUR_CODE
 
     def evaluate(self, state: State) -> float:
         # BEGIN_YOUR_CODE (our solution is 1 line of code, but don't worry if you deviate from this)
-        raise Exception("Not implemented yet")
+        cost = self.pastCosts.get(state.location)
+        if cost is None:
+            cost = self.straightLineHeuristic.evaluate(state)
+            if self.maxCost < float("inf"):
+                cost = max(cost, self.maxCost)
+        return cost
         # END_YOUR_CODE
 
 
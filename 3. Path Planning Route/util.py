@@ -60,6 +60,13 @@ class SearchAlgorithm:
                               SearchAlgorithm to the corresponding cost to get there
                               from the starting location.
         """
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Clear the results of any previous `solve()`, so a single SearchAlgorithm
+        instance can be reused across problems.
+        """
         self.actions: List[str] = None
         self.pathCost: float = None
         self.numStatesExplored: int = 0
@@ -82,9 +89,14 @@ class Heuristic:
 
 
 class UniformCostSearch(SearchAlgorithm):
-    def __init__(self, verbose: int = 0):
+    def __init__(self, verbose: int = 0, maxCost: float = float("inf")):
+        """
+        If `maxCost` is given, the search stops once every state with a pastCost of at
+        most `maxCost` has been explored (states beyond it get no `pastCosts` entry).
+        """
         super().__init__()
         self.verbose = verbose
+        self.maxCost = maxCost
 
     def solve(self, problem: SearchProblem) -> None:
         """
@@ -98,10 +110,7 @@ class UniformCostSearch(SearchAlgorithm):
 
         *Hint*: Some of these might be really helpful for Problem 3!
         """
-        self.actions: List[str] = None
-        self.pathCost: float = None
-        self.numStatesExplored: int = 0
-        self.pastCosts: Dict[State, float] = {}
+        self.reset()
 
         # Initialize data structures
         frontier = PriorityQueue()  # Explored states are maintained by the frontier.
@@ -118,6 +127,10 @@ class UniformCostSearch(SearchAlgorithm):
                 if self.verbose >= 1:
                     print("Searched the entire search space!")
                 return
+            if pastCost > self.maxCost:
+                if self.verbose >= 1:
+                    print(f"Searched all states within maxCost = {self.maxCost}!")
+                return
 
             # Update tracking variables
             self.pastCosts[state.location] = pastCost
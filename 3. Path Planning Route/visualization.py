@@ -1,13 +1,31 @@
 import argparse
 import json
-from typing import List
+from typing import List, Sequence, Tuple
 
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 
 from mapUtil import CityMap, addLandmarks, readMap
 
 
+def lineSegments(
+    coordinates: np.ndarray, sourceIds: Sequence[int], targetIds: Sequence[int]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Flatten the segments `sourceIds[i] -> targetIds[i]` into the (lat, lon) arrays
+    Plotly expects for a single line trace: source, target, then a NaN gap (which
+    Plotly serializes as null) for every segment.
+
+    :param coordinates: (numLocations, 2) array of (latitude, longitude) per id.
+    """
+    segments = np.full((len(sourceIds), 3, 2), np.nan)
+    segments[:, 0] = coordinates[sourceIds]
+    segments[:, 1] = coordinates[targetIds]
+    lat, lon = segments.reshape(-1, 2).T
+    return lat, lon
+
+
 def plotMap(cityMap: CityMap, path: List[str], waypointTags: List[str], mapName: str):
     """
     Plot the full map, highlighting the provided path.
@@ -17,39 +35,21 @@ def plotMap(cityMap: CityMap, path: List[str], waypointTags: List[str], mapName:
     :param waypointTags: List of tags that we care about hitting along the way.
     :param mapName: Display title for map visualization.
     """
-    lat, lon = [], []
-
-    # Convert `cityMap.distances` to a list of (source, target) tuples...
-    connections = [
-        (source, target)
-        for source in cityMap.distances
-        for target in cityMap.distances[source]
-    ]
-    for source, target in connections:
-        lat.append(cityMap.geoLocations[source].latitude)
-        lat.append(cityMap.geoLocations[target].latitude)
-        lat.append(None)
-        lon.append(cityMap.geoLocations[source].longitude)
-        lon.append(cityMap.geoLocations[target].longitude)
-        lon.append(None)
+    # Every connection, by id, straight from the CSR lists built by `finalize()`
+    # (ids follow the order of `cityMap.geoLocations`)
+    cityMap.finalize()
+    coordinates = np.array(list(cityMap.geoLocations.values()))
+    sourceIds = np.repeat(np.arange(len(cityMap.labels)), np.diff(cityMap.neighborPtr))
+    lat, lon = lineSegments(coordinates, sourceIds, cityMap.neighborIds)
 
     # Plot all states & connections
     fig = px.line_geo(lat=lat, lon=lon)
 
     # Plot path (represented by connections in `path`)
     if len(path) > 0:
-        solutionLat, solutionLon = [], []
-
-        # Get and convert `path` to (source, target) tuples to append to lat, lon lists
-        connections = [(path[i], path[i + 1]) for i in range(len(path) - 1)]
-        for connection in connections:
-            source, target = connection
-            solutionLat.append(cityMap.geoLocations[source].latitude)
-            solutionLat.append(cityMap.geoLocations[target].latitude)
-            solutionLat.append(None)
-            solutionLon.append(cityMap.geoLocations[source].longitude)
-            solutionLon.append(cityMap.geoLocations[target].longitude)
-            solutionLon.append(None)
+        # Get and convert `path` to (source, target) ids to build lat, lon arrays
+        pathIds = [cityMap.labelIds[location] for location in path]
+        solutionLat, solutionLon = lineSegments(coordinates, pathIds[:-1], pathIds[1:])
 
         # Visualize path by adding a trace
         fig.add_trace(
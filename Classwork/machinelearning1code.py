@@ -24,25 +24,26 @@ def phi(x):
 def initialWeightVector():
     return np.zeros(2)
 
-def trainLoss(w):
-    return 1.0 / len(trainExamples) * sum((w.dot(phi(x)) - y)**2 for x, y in trainExamples)
+# Stack the examples once: row i of X is phi(x_i), Y[i] is y_i
+X = np.array([phi(x) for x, y in trainExamples], dtype=float)
+Y = np.array([y for x, y in trainExamples], dtype=float)
 
-def gradientTrainLoss(w):
-    return 1.0 / len(trainExamples) * sum(2 * (w.dot(phi(x)) - y) * phi(x) for x, y in trainExamples)
+def trainLossAndGradient(w):
+    residuals = X.dot(w) - Y
+    return residuals.dot(residuals) / len(Y), 2.0 / len(Y) * X.T.dot(residuals)
 
 ############################################################
 # Optimization algorithm
 
-def gradientDescent(F, gradientF, initialWeightVector):
+def gradientDescent(FAndGradientF, initialWeightVector):
     w = initialWeightVector()
     eta = 0.1
     for t in range(500):
-        value = F(w)
-        gradient = gradientF(w)
+        value, gradient = FAndGradientF(w)
         w = w - eta * gradient
         print(f'epoch {t}: w = {w}, F(w) = {value}, gradientF = {gradient}')
 
-gradientDescent(trainLoss, gradientTrainLoss, initialWeightVector)
+gradientDescent(trainLossAndGradient, initialWeightVector)
 
 
 ############################################################
@@ -64,22 +65,22 @@ def phi(x):
 def initialWeightVector():
     return np.zeros(2)
 
-def trainLoss(w):
-    return 1.0 / len(trainExamples) * sum(max(1 - w.dot(phi(x)) * y, 0) for x, y in trainExamples)
+X = np.array([phi(x) for x, y in trainExamples], dtype=float)
+Y = np.array([y for x, y in trainExamples], dtype=float)
 
-def gradientTrainLoss(w):
-    return 1.0 / len(trainExamples) * sum(-phi(x) * y if 1 - w.dot(phi(x)) * y > 0 else 0 for x, y in trainExamples)
+def trainLossAndGradient(w):
+    margins = 1 - X.dot(w) * Y
+    return np.maximum(margins, 0).mean(), -((margins > 0) * Y).dot(X) / len(Y)
 
 ############################################################
 # Optimization algorithm
 
-def gradientDescent(F, gradientF, initialWeightVector):
+def gradientDescent(FAndGradientF, initialWeightVector):
     w = initialWeightVector()
     eta = 0.1
     for t in range(500):
-        value = F(w)
-        gradient = gradientF(w)
+        value, gradient = FAndGradientF(w)
         w = w - eta * gradient
         print(f'epoch {t}: w = {w}, F(w) = {value}, gradientF = {gradient}')
 
-gradientDescent(trainLoss, gradientTrainLoss, initialWeightVector)
+gradientDescent(trainLossAndGradient, initialWeightVector)
@@ -3,25 +3,38 @@ This file depends on submission.py from your sentiment homework.
 You can run it if you plug in your submission.
 """
 
+import sys
 import submission, util
-from collections import defaultdict
 
 # Read in examples
 trainExamples = util.readExamples('names.train')
 validExamples = util.readExamples('names.valid')
 
+featureCache = {}  # x => featureExtractor(x)
+
 def featureExtractor(x):
+    # phi(x) only depends on x, but learnPredictor asks for it on every pass over
+    # the data: compute it once per example (callers only read the result)
+    phi = featureCache.get(x)
+    if phi is None:
+        phi = featureCache[x] = extractFeatures(x)
+    return phi
+
+def extractFeatures(x):
     # Example: x = "took Mauritius into"
-    phi = defaultdict(float)
+    # Every feature has value 1, so a plain dict will do; keys are interned, since
+    # the same feature names recur across examples (and in the weights)
+    phi = {}
     tokens = x.split()
     left, entity, right = tokens[0], tokens[1:-1], tokens[-1]
-    phi['entity is ' + ' '.join(entity)] = 1
-    phi['left is ' + left] = 1
-    phi['right is ' + right] = 1
+    entityName = ' '.join(entity)
+    phi[sys.intern(f'entity is {entityName}')] = 1
+    phi[sys.intern(f'left is {left}')] = 1
+    phi[sys.intern(f'right is {right}')] = 1
     for word in entity:
-        phi['entity contains ' + word] = 1
-        phi['entity contains prefix ' + word[:4]] = 1  # first 4 characters
-        phi['entity contains suffix ' + word[-4:]] = 1  # last 4 characters
+        phi[sys.intern(f'entity contains {word}')] = 1
+        phi[sys.intern(f'entity contains prefix {word[:4]}')] = 1  # first 4 characters
+        phi[sys.intern(f'entity contains suffix {word[-4:]}')] = 1  # last 4 characters
     return phi
 
 # Learn a predictor
@@ -31,6 +44,7 @@ util.outputErrorAnalysis(validExamples, featureExtractor, weights, 'error-analys
 
 # Test (only do this at the end)!
 testExamples = util.readExamples('names.test')
-predictor = lambda x : 1 if util.dotProduct(featureExtractor(x), weights) > 0 else -1
+# Every feature has value 1, so phi . w is just the sum of the active features' weights
+predictor = lambda x : 1 if sum(weights.get(f, 0) for f in featureExtractor(x)) > 0 else -1
 testError = util.evaluatePredictor(testExamples, predictor)
 print(f'test error = {testError}')
@@ -37,41 +37,45 @@ def backtrackingSearch(problem):
     def recurse(state, history, totalCost):
         # At |state| having undergone |history|, accumulated |totalCost|.
         # Explore the rest of the subtree under |state|.
+        # Costs are positive, so nothing under |state| can beat the best so far.
+        if totalCost >= bestTotalCost[0]:
+            return
         if problem.isEnd(state):
             # Update the best solution so far
             if totalCost < bestTotalCost[0]:
                 bestTotalCost[0] = totalCost
-                bestHistory[0] = history
+                bestHistory[0] = list(history)  # |history| keeps changing; copy it
             return
 
-        # Recurse on children
+        # Recurse on children, extending |history| in place (and undoing it after)
         for action, newState, cost in problem.succAndCost(state):
-            recurse(newState, history + [(action, newState, cost)], totalCost + cost)
+            history.append((action, newState, cost))
+            recurse(newState, history, totalCost + cost)
+            history.pop()
 
     recurse(problem.startState(), history=[], totalCost=0)
     return (bestTotalCost[0], bestHistory[0])
 
 def dynamicProgramming(problem):
-    cache = {}  # state => futureCost(state), action, newState, cost
-    def futureCost(state):
-        # Base case
-        if problem.isEnd(state):
-            return 0
-        if state in cache:  # Exponential savings!
-            return cache[state][0]
-        # Actually do work
-        result = min((cost + futureCost(newState), action, newState, cost) \
+    # Bottom-up: every action moves to a larger state, so fill in
+    # futureCost(state) for state = N, N-1, ..., 1 (no recursion, no dict)
+    N = problem.N
+    futureCost = [0] * (N + 1)  # state => futureCost(state)
+    best = [None] * (N + 1)     # state => action, newState, cost
+    for state in range(N - 1, 0, -1):
+        # Ties go to the alphabetically smaller action, as with min() over tuples
+        result = min((cost + futureCost[newState], action, newState, cost) \
             for action, newState, cost in problem.succAndCost(state))
-        cache[state] = result
-        return result[0]
+        futureCost[state] = result[0]
+        best[state] = result[1:]
 
     state = problem.startState()
-    totalCost = futureCost(state)
+    totalCost = futureCost[state]
 
     # Recover history
     history = []
     while not problem.isEnd(state):
-        _, action, newState, cost = cache[state]
+        action, newState, cost = best[state]
         history.append((action, newState, cost))
         state = newState
 
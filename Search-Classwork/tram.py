@@ -1,3 +1,4 @@
+import functools
 import sys
 import util
 sys.setrecursionlimit(10000)
@@ -32,26 +33,29 @@ def printSolution(solution):
         print(item)
 
 def dynamicProgramming(problem):
-    cache = {}  # state => futureCost(state), action, newState, cost
-    def futureCost(state):
-        # Base case
-        if problem.isEnd(state):
-            return 0
-        if state in cache:  # Exponential savings!
-            return cache[state][0]
-        # Actually do work
-        result = min((cost + futureCost(newState), action, newState, cost) \
-            for action, newState, cost in problem.succAndCost(state))
-        cache[state] = result
-        return result[0]
+    # Bottom-up: every action moves to a larger state, so fill in
+    # futureCost(state) for state = N, N-1, ..., 1 (no recursion, no dict)
+    # The successors of problem.succAndCost are inlined (walk is always possible
+    # below N; tram only while 2 * state <= N)
+    N = problem.N
+    walkCost, tramCost = problem.weights['walk'], problem.weights['tram']
+    futureCost = [0] * (N + 1)  # state => futureCost(state)
+    best = [None] * (N + 1)     # state => action, newState, cost
+    for state in range(N - 1, 0, -1):
+        futureCost[state] = walkCost + futureCost[state + 1]
+        best[state] = ('walk', state + 1, walkCost)
+        # Ties go to 'tram', as they did with min() over (cost, action, ...) tuples
+        if 2 * state <= N and tramCost + futureCost[2 * state] <= futureCost[state]:
+            futureCost[state] = tramCost + futureCost[2 * state]
+            best[state] = ('tram', 2 * state, tramCost)
 
     state = problem.startState()
-    totalCost = futureCost(state)
+    totalCost = futureCost[state]
 
     # Recover history
     history = []
     while not problem.isEnd(state):
-        _, action, newState, cost = cache[state]
+        action, newState, cost = best[state]
         history.append((action, newState, cost))
         state = newState
 
@@ -67,6 +71,12 @@ def predict(N, weights):
     totalCost, history = dynamicProgramming(problem)
     return [action for action, newState, cost in history]
 
+@functools.lru_cache(maxsize=None)
+def cachedPredict(N, walkWeight, tramWeight):
+    # predict() only depends on N and the weights: once training settles, the same
+    # (N, weights) come up again and again, so remember the (immutable) answers
+    return tuple(predict(N, {'walk': walkWeight, 'tram': tramWeight}))
+
 def generateExamples():
     trueWeights = {'walk': 1, 'tram': 5}
     return [(N, predict(N, trueWeights)) for N in range(1, 30)]
@@ -77,12 +87,13 @@ def structuredPerceptron(examples):
         numMistakes = 0
         for N, trueActions in examples:
             # Make a prediction
-            predActions = predict(N, weights)
-            if predActions != trueActions:
-                numMistakes += 1
-            # Update weights
-            for action in trueActions: weights[action] -= 1
-            for action in predActions: weights[action] += 1
+            predActions = list(cachedPredict(N, weights['walk'], weights['tram']))
+            if predActions == trueActions:
+                continue  # Correct prediction: the update would be a no-op
+            numMistakes += 1
+            # Update weights (by how often each action was predicted vs. taken)
+            for action in weights:
+                weights[action] += predActions.count(action) - trueActions.count(action)
         print(('iteration {}, numMistakes = {}, weights = {}'.format(t, numMistakes, weights)))
         if numMistakes == 0:
             break